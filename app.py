@@ -1,362 +1,631 @@
-import os
-import subprocess
-import psutil
-from flask import Flask, request, render_template, jsonify
-from werkzeug.utils import secure_filename
-import threading
-import time
-from queue import Queue
-
-app = Flask(__name__)
-
-# Configuration
-UPLOAD_FOLDER = "submissions"
-EXECUTABLE = os.path.join(UPLOAD_FOLDER, "user.out")
-TESTCASE_DIR = "testcases"
-PROBLEM_STATEMENT_FILE = "problem.ps"
-ALLOWED_EXTENSIONS = {'cpp', 'cc', 'cxx'}
-MAX_FILE_SIZE = 1024 * 1024  # 1MB
-MAX_MEMORY_LIMIT = 256 * 1024 * 1024  # 256MB
-MAX_CPU_TIME = 5  # seconds
-
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
-
-# Ensure dirs exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(TESTCASE_DIR, exist_ok=True)
-
-# Batch processing queue
-batch_queue = Queue()
-results_dict = {}
-
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def get_problem_statement():
-    """Read and return the problem statement from file"""
-    try:
-        if os.path.exists(PROBLEM_STATEMENT_FILE):
-            with open(PROBLEM_STATEMENT_FILE, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            return "# Problem Statement\n\nThis is a sample problem statement. Create a 'problem.ps' file in the same directory as app.py to display your actual problem statement."
-    except Exception as e:
-        return f"# Problem Statement\n\nError reading problem statement file: {str(e)}"
-
-def compile_cpp(filepath):
-    compile_cmd = ["g++", filepath, "-o", EXECUTABLE, "-std=c++11"]
-    try:
-        result = subprocess.run(compile_cmd, capture_output=True, text=True, timeout=30)
-        return result.returncode, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "Compilation timed out (30s)"
-
-def run_test(input_file, expected_file, submission_id, test_id):
-    try:
-        with open(input_file, "r") as infile, open(expected_file, "r") as expfile:
-            expected = expfile.read().strip()
-            input_data = infile.read()
-            
-            # Start process
-            process = subprocess.Popen(
-                [EXECUTABLE],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=UPLOAD_FOLDER
-            )
-            
-            try:
-                start_time = time.time()
-                memory_used = 0
-                
-                # Send input and get output with timeout
-                stdout, stderr = process.communicate(input=input_data, timeout=MAX_CPU_TIME)
-                output = stdout.strip()
-                
-                # Check memory usage after process completes
-                try:
-                    if os.name == 'nt':  # Windows
-                        mem_info = psutil.Process(process.pid).memory_info()
-                        memory_used = mem_info.rss
-                    else:  # Unix-like systems
-                        # For Unix, we need to monitor differently
-                        memory_used = 0
-                        for child in psutil.Process(process.pid).children(recursive=True):
-                            memory_used += child.memory_info().rss
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    memory_used = 0
-                
-                # Check if memory limit exceeded
-                if memory_used > MAX_MEMORY_LIMIT:
-                    return False, f"Memory limit exceeded ({memory_used} bytes)", expected, memory_used
-                
-                if process.returncode != 0:
-                    return False, f"Runtime error (return code {process.returncode}): {stderr}", expected, memory_used
-                
-                return output == expected, output, expected, memory_used
-                
-            except subprocess.TimeoutExpired:
-                process.kill()
-                return False, "Time limit exceeded (5s)", expected, 0
-            except Exception as e:
-                process.kill()
-                return False, f"Unexpected error: {str(e)}", expected, 0
-                
-    except FileNotFoundError:
-        return False, "Test case files not found", "", 0
-    except Exception as e:
-        return False, f"Unexpected error: {str(e)}", "", 0
-
-def grade_submission(filepath, submission_id):
-    """Grade a single submission and store results"""
-    results = {
-        'submission_id': submission_id,
-        'filename': os.path.basename(filepath),
-        'compile_status': 'pending',
-        'test_results': [],
-        'memory_usage': [],
-        'overall_status': 'pending',
-        'status': 'processing'
-    }
-    
-    # Update results dict
-    results_dict[submission_id] = results
-    
-    # Compile
-    code, stderr = compile_cpp(filepath)
-    if code != 0:
-        results['compile_status'] = 'error'
-        results['compile_error'] = stderr
-        results['overall_status'] = 'compile_error'
-        results['status'] = 'completed'
-        return
-    
-    results['compile_status'] = 'success'
-    
-    # Run public test cases
-    public_passed = 0
-    public_total = 0
-    
-    # Find all test cases
-    test_cases = []
-    for f in os.listdir(TESTCASE_DIR):
-        if f.startswith('input') and f.endswith('.txt'):
-            try:
-                test_cases.append(int(f[5:-4]))
-            except ValueError:
-                continue
-    
-    for i in sorted(test_cases):
-        input_file = f"{TESTCASE_DIR}/input{i}.txt"
-        expected_file = f"{TESTCASE_DIR}/output{i}.txt"
-        
-        if os.path.exists(input_file) and os.path.exists(expected_file):
-            public_total += 1
-            ok, out, exp, mem_used = run_test(input_file, expected_file, submission_id, f"public_{i}")
-            
-            result = {
-                "type": "Public",
-                "case": i,
-                "status": "PASS" if ok else "FAIL",
-                "expected": exp,
-                "got": out,
-                "memory_used": mem_used
-            }
-            
-            results['test_results'].append(result)
-            results['memory_usage'].append(mem_used)
-            
-            if ok:
-                public_passed += 1
-    
-    # Run hidden test cases
-    hidden_passed = 0
-    hidden_total = 0
-    
-    # Find all hidden test cases
-    hidden_test_cases = []
-    for f in os.listdir(TESTCASE_DIR):
-        if f.startswith('hidden_input') and f.endswith('.txt'):
-            try:
-                hidden_test_cases.append(int(f[11:-4]))
-            except ValueError:
-                continue
-    
-    for i in sorted(hidden_test_cases):
-        input_file = f"{TESTCASE_DIR}/hidden_input{i}.txt"
-        expected_file = f"{TESTCASE_DIR}/hidden_output{i}.txt"
-        
-        if os.path.exists(input_file) and os.path.exists(expected_file):
-            hidden_total += 1
-            ok, out, exp, mem_used = run_test(input_file, expected_file, submission_id, f"hidden_{i}")
-            
-            result = {
-                "type": "Hidden",
-                "case": i,
-                "status": "PASS" if ok else "FAIL",
-                "memory_used": mem_used
-            }
-            
-            results['test_results'].append(result)
-            results['memory_usage'].append(mem_used)
-            
-            if ok:
-                hidden_passed += 1
-    
-    # Calculate overall status
-    total_tests = public_total + hidden_total
-    total_passed = public_passed + hidden_passed
-    
-    if total_tests == 0:
-        results['overall_status'] = 'no_tests'
-    elif total_passed == total_tests:
-        results['overall_status'] = 'success'
-    else:
-        results['overall_status'] = 'partial'
-    
-    results['score'] = f"{total_passed}/{total_tests}"
-    results['public_score'] = f"{public_passed}/{public_total}" if public_total > 0 else "N/A"
-    results['hidden_score'] = f"{hidden_passed}/{hidden_total}" if hidden_total > 0 else "N/A"
-    results['status'] = 'completed'
-
-def batch_worker():
-    """Worker thread for processing batch submissions"""
-    while True:
-        if not batch_queue.empty():
-            filepath, submission_id = batch_queue.get()
-            try:
-                grade_submission(filepath, submission_id)
-            except Exception as e:
-                print(f"Error grading submission {submission_id}: {str(e)}")
-                results_dict[submission_id] = {
-                    'submission_id': submission_id,
-                    'filename': os.path.basename(filepath),
-                    'compile_status': 'error',
-                    'compile_error': f'Grading failed: {str(e)}',
-                    'overall_status': 'error',
-                    'status': 'completed'
-                }
-            batch_queue.task_done()
-        time.sleep(0.1)
-
-# Start batch processing thread
-batch_thread = threading.Thread(target=batch_worker, daemon=True)
-batch_thread.start()
-
-@app.route("/")
-def index():
-    problem_statement = get_problem_statement()
-    return render_template("index.html", problem_statement=problem_statement)
-
-@app.route("/upload", methods=["POST"])
-def upload_file():
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-            file.save(filepath)
-            
-            # Generate unique submission ID
-            submission_id = str(int(time.time() * 1000))
-            
-            # Initialize result entry
-            results_dict[submission_id] = {
-                'submission_id': submission_id,
-                'filename': filename,
-                'compile_status': 'pending',
-                'test_results': [],
-                'memory_usage': [],
-                'overall_status': 'pending',
-                'status': 'processing'
-            }
-            
-            # Add to batch queue
-            batch_queue.put((filepath, submission_id))
-            
-            return jsonify({
-                'submission_id': submission_id,
-                'filename': filename,
-                'message': 'File uploaded and queued for grading'
-            })
-        
-        return jsonify({'error': 'Invalid file type. Only .cpp, .cc, and .cxx files are allowed.'}), 400
-    except Exception as e:
-        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
-
-@app.route("/status/<submission_id>")
-def get_status(submission_id):
-    if submission_id in results_dict:
-        result = results_dict[submission_id]
-        # If grading is completed, make sure to return the final status
-        if result.get('status') == 'completed':
-            return jsonify(result)
-        else:
-            # Return processing status with current progress
-            progress_data = {
-                'status': 'processing',
-                'submission_id': submission_id,
-                'filename': result.get('filename', ''),
-                'compile_status': result.get('compile_status', 'pending'),
-                'test_count': len(result.get('test_results', [])),
-                'message': 'Grading in progress...'
-            }
-            return jsonify(progress_data)
-    
-    # If submission ID not found, it might not be processed yet
-    return jsonify({'status': 'processing', 'message': 'Submission queued for processing'})
-
-@app.route("/batch_upload", methods=["POST"])
-def batch_upload():
-    try:
-        if 'files' not in request.files:
-            return jsonify({'error': 'No files uploaded'}), 400
-        
-        files = request.files.getlist('files')
-        if not files or all(file.filename == '' for file in files):
-            return jsonify({'error': 'No files selected'}), 400
-        
-        submission_ids = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-                file.save(filepath)
-                
-                # Generate unique submission ID
-                submission_id = str(int(time.time() * 1000) + len(submission_ids))
-                submission_ids.append(submission_id)
-                
-                # Initialize result entry
-                results_dict[submission_id] = {
-                    'submission_id': submission_id,
-                    'filename': filename,
-                    'compile_status': 'pending',
-                    'test_results': [],
-                    'memory_usage': [],
-                    'overall_status': 'pending',
-                    'status': 'processing'
-                }
-                
-                # Add to batch queue
-                batch_queue.put((filepath, submission_id))
-        
-        return jsonify({
-            'submission_ids': submission_ids,
-            'message': f'{len(submission_ids)} files uploaded and queued for grading'
-        })
-    except Exception as e:
-        return jsonify({'error': f'Batch upload failed: {str(e)}'}), 500
-
-if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+import hashlib
+import os
+import re
+import subprocess
+import orjson
+from flask import Flask, request, render_template, Response
+from werkzeug.utils import secure_filename
+import multiprocessing
+import signal
+import sqlite3
+import tempfile
+import zlib
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+if os.name != 'nt':
+    import resource
+
+app = Flask(__name__)
+
+# Configuration
+UPLOAD_FOLDER = "submissions"
+TESTCASE_DIR = "testcases"
+PROBLEM_STATEMENT_FILE = "problem.ps"
+ALLOWED_EXTENSIONS = {'cpp', 'cc', 'cxx'}
+MAX_FILE_SIZE = 1024 * 1024  # 1MB
+MAX_MEMORY_LIMIT = 256 * 1024 * 1024  # 256MB
+MAX_CPU_TIME = 5  # seconds
+MAX_PARALLEL_TESTS = min(8, os.cpu_count())
+COMPILE_CACHE_DIR = os.path.join(UPLOAD_FOLDER, ".cache")
+COMPILE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB of cached binaries
+CAS_DIR = os.path.join(UPLOAD_FOLDER, ".cas")
+MAX_RESULTS = 10_000  # cap on retained grading results
+GRADES_DB = "grades.db"
+
+app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+
+# Ensure dirs exist
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(TESTCASE_DIR, exist_ok=True)
+os.makedirs(COMPILE_CACHE_DIR, exist_ok=True)
+os.makedirs(CAS_DIR, exist_ok=True)
+
+class ShardedResults:
+    """Results store partitioned across several Manager dicts.
+
+    Submission IDs are spread over the shards by a stable hash so that
+    status polls and grading workers hitting different submissions don't
+    all serialize through one proxy. crc32 rather than hash() keeps the
+    shard choice identical in every worker process.
+
+    Each shard holds at most max_entries/n results; inserting past that
+    evicts the oldest entries so a long-running server doesn't accumulate
+    every grading run ever made.
+    """
+
+    def __init__(self, manager, n, max_entries=MAX_RESULTS):
+        self._n = n
+        self._shards = [manager.dict() for _ in range(n)]
+        self._max_per_shard = max(1, max_entries // n)
+
+    def _shard(self, key):
+        return self._shards[zlib.crc32(str(key).encode()) % self._n]
+
+    def __getitem__(self, key):
+        return self._shard(key)[key]
+
+    def __setitem__(self, key, value):
+        shard = self._shard(key)
+        shard[key] = value
+        while len(shard) > self._max_per_shard:
+            oldest = shard.keys()[0]  # Manager dicts keep insertion order
+            if oldest == key:
+                break
+            try:
+                del shard[oldest]
+            except KeyError:
+                break
+
+    def __delitem__(self, key):
+        del self._shard(key)[key]
+
+    def __contains__(self, key):
+        return key in self._shard(key)
+
+    def get(self, key, default=None):
+        return self._shard(key).get(key, default)
+
+# Shared grading state and worker pool
+# results_dict holds only in-flight submissions; completed grades are
+# archived to SQLite so they survive restarts and the hot store stays
+# small. It lives in Manager dicts so pool workers can publish progress
+# that the Flask process reads back out on /status polls.
+_manager = multiprocessing.Manager()
+results_dict = ShardedResults(_manager, os.cpu_count())
+executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+_db_local = threading.local()
+
+def _grades_db():
+    """Per-process (and per-thread) connection to the grades archive"""
+    if getattr(_db_local, 'pid', None) != os.getpid():
+        _db_local.db = None  # forked child inherited the parent's handle
+        _db_local.pid = os.getpid()
+    if getattr(_db_local, 'db', None) is None:
+        db = sqlite3.connect(GRADES_DB, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS grades ("
+            "submission_id TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        _db_local.db = db
+    return _db_local.db
+
+def _archive_result(results):
+    """Move a completed grading result from the hot store into SQLite"""
+    submission_id = results['submission_id']
+    db = _grades_db()
+    with db:
+        db.execute("INSERT OR REPLACE INTO grades VALUES (?, ?)",
+                   (submission_id, orjson.dumps(results).decode()))
+    try:
+        del results_dict[submission_id]
+    except KeyError:
+        pass
+
+# Testcase cache: the directory changes rarely, so scan it once and only
+# rescan when its mtime moves instead of on every submission. Expected
+# outputs are small and immutable, so their bytes are loaded here too
+# rather than re-read for every submission
+_TESTCASE_RE = re.compile(r'^(hidden_)?input(\d+)\.txt$')
+_TESTCASE_CACHE = {'mtime': None, 'public': [], 'hidden': []}
+
+def _refresh_testcases():
+    """Rescan TESTCASE_DIR if it changed since the last scan"""
+    try:
+        mtime = os.stat(TESTCASE_DIR).st_mtime
+    except FileNotFoundError:
+        _TESTCASE_CACHE.update(mtime=None, public=[], hidden=[])
+        return
+
+    if mtime == _TESTCASE_CACHE['mtime']:
+        return
+
+    public = []
+    hidden = []
+    for entry in os.scandir(TESTCASE_DIR):
+        m = _TESTCASE_RE.match(entry.name)
+        if not m:
+            continue
+        i = int(m.group(2))
+        prefix = 'hidden_' if m.group(1) else ''
+        expected_file = os.path.join(TESTCASE_DIR, f"{prefix}output{i}.txt")
+        try:
+            with open(expected_file, "rb") as f:
+                expected = f.read().rstrip()
+        except FileNotFoundError:
+            continue
+        target = hidden if m.group(1) else public
+        target.append((os.path.abspath(entry.path), expected, i))
+
+    public.sort(key=lambda t: t[2])
+    hidden.sort(key=lambda t: t[2])
+    _TESTCASE_CACHE.update(mtime=mtime, public=public, hidden=hidden)
+
+_refresh_testcases()
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def save_submission(data, filepath):
+    """Save uploaded bytes, skipping the disk write for repeated content.
+
+    The bytes are stored once per unique source in a content-addressed
+    directory; duplicate uploads (common in classroom batches) just get a
+    hardlink to the existing copy instead of a fresh write.
+    """
+    h = hashlib.blake2b(data, digest_size=16).hexdigest()
+    cas_path = os.path.join(CAS_DIR, h + ".cpp")
+
+    # Write-then-rename keeps both the store entry and the destination
+    # atomic: concurrent workers never observe a partial or missing file
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    if not os.path.exists(cas_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, cas_path)
+
+    os.link(cas_path, tmp_path)
+    os.rename(tmp_path, filepath)
+
+def get_problem_statement():
+    """Read and return the problem statement from file"""
+    try:
+        if os.path.exists(PROBLEM_STATEMENT_FILE):
+            with open(PROBLEM_STATEMENT_FILE, 'r', encoding='utf-8') as f:
+                return f.read()
+        else:
+            return "# Problem Statement\n\nThis is a sample problem statement. Create a 'problem.ps' file in the same directory as app.py to display your actual problem statement."
+    except Exception as e:
+        return f"# Problem Statement\n\nError reading problem statement file: {str(e)}"
+
+def _evict_compile_cache():
+    """Drop least-recently-used cached binaries once the cache outgrows its cap"""
+    entries = []
+    total = 0
+    for entry in os.scandir(COMPILE_CACHE_DIR):
+        st = entry.stat()
+        entries.append((st.st_mtime, st.st_size, entry.path))
+        total += st.st_size
+
+    if total <= COMPILE_CACHE_MAX_BYTES:
+        return
+
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= COMPILE_CACHE_MAX_BYTES:
+            break
+
+def compile_cpp(filepath, executable):
+    # Identical source bytes produce identical binaries, so cache compiled
+    # output by content hash and skip g++ entirely on a hit
+    with open(filepath, 'rb') as f:
+        source = f.read()
+    h = hashlib.blake2b(source, digest_size=16).hexdigest()
+    cache_path = os.path.join(COMPILE_CACHE_DIR, f"{h}.out")
+
+    if os.path.exists(cache_path):
+        try:
+            os.remove(executable)
+        except FileNotFoundError:
+            pass
+        os.link(cache_path, executable)
+        os.utime(cache_path)  # bump recency for LRU eviction
+        return 0, ""
+
+    # Compile speed matters more than runtime optimization here: the
+    # program runs for at most MAX_CPU_TIME seconds. -O0 skips optimizer
+    # passes and -pipe keeps the cc1/as handoff out of temp files.
+    compile_cmd = ["g++", "-pipe", "-O0", filepath, "-o", executable, "-std=c++17"]
+    try:
+        result = subprocess.run(compile_cmd, capture_output=True, text=True, timeout=30)
+    except subprocess.TimeoutExpired:
+        return -1, "Compilation timed out (30s)"
+
+    if result.returncode == 0:
+        try:
+            os.link(executable, cache_path)
+        except FileExistsError:
+            pass  # another worker cached the same source first
+        _evict_compile_cache()
+
+    return result.returncode, result.stderr
+
+def _json_response(obj, status=200):
+    """Serialize a response with orjson, which beats stdlib json by 3-10x"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+def _to_text(value):
+    """Decode raw byte output at the JSON boundary; error strings pass through"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+def _limit_child_resources():
+    """Apply kernel-enforced memory and CPU limits to the graded process"""
+    resource.setrlimit(resource.RLIMIT_AS, (MAX_MEMORY_LIMIT, MAX_MEMORY_LIMIT))
+    resource.setrlimit(resource.RLIMIT_CPU, (MAX_CPU_TIME, MAX_CPU_TIME))
+
+def run_test(executable, input_file, expected, submission_id, test_id):
+    try:
+        with open(input_file, "rb") as infile, \
+             tempfile.TemporaryDirectory(dir=UPLOAD_FOLDER) as workdir, \
+             tempfile.TemporaryFile() as errfile:
+            # Start process in its own scratch dir so parallel tests can't
+            # collide on any files the program creates. On Unix the input
+            # file is wired straight to the child's stdin, so the kernel
+            # streams it without copying the bytes through Python first,
+            # and the child leads its own session so the timeout can kill
+            # its entire process tree, not just the direct child.
+            process = subprocess.Popen(
+                [os.path.abspath(executable)],
+                stdin=subprocess.PIPE if os.name == 'nt' else infile,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE if os.name == 'nt' else errfile,
+                cwd=workdir,
+                preexec_fn=None if os.name == 'nt' else _limit_child_resources,
+                start_new_session=os.name != 'nt'
+            )
+
+            try:
+                memory_used = 0
+
+                if os.name == 'nt':  # Windows: no rlimits/wait4 available
+                    import psutil  # lazy: the Unix path never pays for it
+                    stdout, stderr = process.communicate(input=infile.read(), timeout=MAX_CPU_TIME)
+                    output = stdout.rstrip()
+                    try:
+                        memory_used = psutil.Process(process.pid).memory_info().rss
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        memory_used = 0
+                else:
+                    # Read stdout ourselves instead of communicate() so the
+                    # child is still ours to reap with os.wait4, which hands
+                    # back rusage for free
+                    timed_out = threading.Event()
+
+                    def _kill_on_timeout():
+                        # Signal the whole process group with os.killpg, not
+                        # through the Popen object: submissions may fork, and
+                        # stdout only hits EOF once every writer is dead.
+                        # Going through process.kill() would also let Popen
+                        # reap the child and break os.wait4 below.
+                        timed_out.set()
+                        try:
+                            os.killpg(process.pid, signal.SIGKILL)
+                        except (ProcessLookupError, PermissionError):
+                            pass
+
+                    timer = threading.Timer(MAX_CPU_TIME, _kill_on_timeout)
+                    timer.start()
+                    try:
+                        stdout = process.stdout.read()
+                    finally:
+                        timer.cancel()
+
+                    try:
+                        _, status, rusage = os.wait4(process.pid, 0)
+                        process.returncode = os.waitstatus_to_exitcode(status)
+                        memory_used = rusage.ru_maxrss * 1024  # ru_maxrss is KiB on Linux
+                    except ChildProcessError:
+                        # Already reaped elsewhere; the timed_out flag below
+                        # still tells us what verdict to give
+                        if process.returncode is None:
+                            process.returncode = -signal.SIGKILL
+                        memory_used = 0
+                    output = stdout.rstrip()
+
+                    # stderr went to a temp file; only pay to read it on failure
+                    if process.returncode != 0:
+                        errfile.seek(0)
+                        stderr = errfile.read()
+                    else:
+                        stderr = b""
+
+                    if timed_out.is_set():
+                        return False, f"Time limit exceeded ({MAX_CPU_TIME}s)", expected, memory_used
+
+                # Check if memory limit exceeded
+                if memory_used > MAX_MEMORY_LIMIT:
+                    return False, f"Memory limit exceeded ({memory_used} bytes)", expected, memory_used
+
+                if process.returncode != 0:
+                    stderr_text = stderr.decode('utf-8', errors='replace')
+                    return False, f"Runtime error (return code {process.returncode}): {stderr_text}", expected, memory_used
+
+                return output == expected, output, expected, memory_used
+
+            except subprocess.TimeoutExpired:
+                process.kill()
+                return False, "Time limit exceeded (5s)", expected, 0
+            except Exception as e:
+                process.kill()
+                return False, f"Unexpected error: {str(e)}", expected, 0
+
+    except FileNotFoundError:
+        return False, "Test case files not found", "", 0
+    except Exception as e:
+        return False, f"Unexpected error: {str(e)}", "", 0
+
+def grade_submission(filepath, submission_id, filename=None):
+    """Grade a single submission and store results"""
+    results = {
+        'submission_id': submission_id,
+        'filename': filename or os.path.basename(filepath),
+        'compile_status': 'pending',
+        'test_results': [],
+        'memory_usage': [],
+        'overall_status': 'pending',
+        'status': 'processing'
+    }
+    
+    # Update results dict
+    results_dict[submission_id] = results
+
+    # Each submission gets its own binary so parallel grading runs
+    # never clobber one another
+    executable = os.path.join(UPLOAD_FOLDER, f"{submission_id}.out")
+
+    try:
+        # Compile
+        code, stderr = compile_cpp(filepath, executable)
+        if code != 0:
+            results['compile_status'] = 'error'
+            results['compile_error'] = stderr
+            results['overall_status'] = 'compile_error'
+            results['status'] = 'completed'
+            _archive_result(results)
+            return
+
+        results['compile_status'] = 'success'
+        results_dict[submission_id] = results
+    
+        # Build the full task list from the cached listing: public cases
+        # first, then hidden
+        _refresh_testcases()
+        tasks = []
+        for input_file, expected, i in _TESTCASE_CACHE['public']:
+            tasks.append(("Public", i, input_file, expected, f"public_{i}"))
+        for input_file, expected, i in _TESTCASE_CACHE['hidden']:
+            tasks.append(("Hidden", i, input_file, expected, f"hidden_{i}"))
+
+        # Run tests in parallel; run_test blocks on the child process, which
+        # releases the GIL, so threads are enough to overlap the waits
+        public_passed = 0
+        public_total = 0
+        hidden_passed = 0
+        hidden_total = 0
+
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_TESTS) as pool:
+            futures = {
+                pool.submit(run_test, executable, input_file, expected,
+                            submission_id, test_id): (test_type, i)
+                for test_type, i, input_file, expected, test_id in tasks
+            }
+
+            # Handle each verdict the moment its child exits rather than in
+            # submission order, so one slow case never holds up the rest,
+            # and publish after every one so /status sees progress
+            for future in as_completed(futures):
+                test_type, i = futures[future]
+                ok, out, exp, mem_used = future.result()
+
+                result = {
+                    "type": test_type,
+                    "case": i,
+                    "status": "PASS" if ok else "FAIL",
+                    "memory_used": mem_used
+                }
+
+                if test_type == "Public":
+                    result["expected"] = _to_text(exp)
+                    result["got"] = _to_text(out)
+                    public_total += 1
+                    if ok:
+                        public_passed += 1
+                else:
+                    hidden_total += 1
+                    if ok:
+                        hidden_passed += 1
+
+                results['test_results'].append(result)
+                results['memory_usage'].append(mem_used)
+                results_dict[submission_id] = results
+
+        # Sort into display order (public first, then by case number) once
+        # everything is in
+        results['test_results'].sort(
+            key=lambda r: (r['type'] != "Public", r['case']))
+        results['memory_usage'] = [r['memory_used'] for r in results['test_results']]
+    
+        # Calculate overall status
+        total_tests = public_total + hidden_total
+        total_passed = public_passed + hidden_passed
+    
+        if total_tests == 0:
+            results['overall_status'] = 'no_tests'
+        elif total_passed == total_tests:
+            results['overall_status'] = 'success'
+        else:
+            results['overall_status'] = 'partial'
+    
+        results['score'] = f"{total_passed}/{total_tests}"
+        results['public_score'] = f"{public_passed}/{public_total}" if public_total > 0 else "N/A"
+        results['hidden_score'] = f"{hidden_passed}/{hidden_total}" if hidden_total > 0 else "N/A"
+        results['status'] = 'completed'
+        _archive_result(results)
+    finally:
+        try:
+            os.remove(executable)
+        except FileNotFoundError:
+            pass
+
+def save_and_grade_job(data, filename, submission_id):
+    """Pool worker entry point: persist the upload, then grade it.
+
+    Writing the file here instead of in the request handler lets the
+    upload endpoints respond as soon as the bytes are off the socket.
+    Failures anywhere are recorded as a completed error result.
+    """
+    # Source lands under the submission ID, not the upload's name: shared
+    # names like main.cpp would let concurrent gradings swap sources
+    filepath = os.path.join(UPLOAD_FOLDER, f"{submission_id}.cpp")
+    try:
+        save_submission(data, filepath)
+        grade_submission(filepath, submission_id, filename)
+    except Exception as e:
+        print(f"Error grading submission {submission_id}: {str(e)}")
+        _archive_result({
+            'submission_id': submission_id,
+            'filename': filename,
+            'compile_status': 'error',
+            'compile_error': f'Grading failed: {str(e)}',
+            'overall_status': 'error',
+            'status': 'completed'
+        })
+
+@app.route("/")
+def index():
+    problem_statement = get_problem_statement()
+    return render_template("index.html", problem_statement=problem_statement)
+
+@app.route("/upload", methods=["POST"])
+def upload_file():
+    try:
+        if 'file' not in request.files:
+            return _json_response({'error': 'No file uploaded'}, 400)
+        
+        file = request.files['file']
+        if file.filename == '':
+            return _json_response({'error': 'No file selected'}, 400)
+        
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            data = file.read()
+
+            # Generate unique submission ID; uuid stays collision-free
+            # across preforked workers, unlike a millisecond timestamp
+            submission_id = uuid.uuid4().hex
+            
+            # Initialize result entry
+            results_dict[submission_id] = {
+                'submission_id': submission_id,
+                'filename': filename,
+                'compile_status': 'pending',
+                'test_results': [],
+                'memory_usage': [],
+                'overall_status': 'pending',
+                'status': 'processing'
+            }
+            
+            # Hand off to the grading pool; the worker writes the file
+            executor.submit(save_and_grade_job, data, filename, submission_id)
+
+            return _json_response({
+                'submission_id': submission_id,
+                'filename': filename,
+                'message': 'File uploaded and queued for grading'
+            })
+        
+        return _json_response({'error': 'Invalid file type. Only .cpp, .cc, and .cxx files are allowed.'}, 400)
+    except Exception as e:
+        return _json_response({'error': f'Upload failed: {str(e)}'}, 500)
+
+@app.route("/status/<submission_id>")
+def get_status(submission_id):
+    if submission_id in results_dict:
+        result = results_dict[submission_id]
+        # If grading is completed, make sure to return the final status
+        if result.get('status') == 'completed':
+            return _json_response(result)
+        else:
+            # Return processing status with current progress
+            progress_data = {
+                'status': 'processing',
+                'submission_id': submission_id,
+                'filename': result.get('filename', ''),
+                'compile_status': result.get('compile_status', 'pending'),
+                'test_count': len(result.get('test_results', [])),
+                'message': 'Grading in progress...'
+            }
+            return _json_response(progress_data)
+
+    # Completed submissions live in the archive, already serialized
+    row = _grades_db().execute(
+        "SELECT result FROM grades WHERE submission_id = ?",
+        (submission_id,)).fetchone()
+    if row:
+        return Response(row[0], mimetype='application/json')
+
+    # If submission ID not found, it might not be processed yet
+    return _json_response({'status': 'processing', 'message': 'Submission queued for processing'})
+
+@app.route("/batch_upload", methods=["POST"])
+def batch_upload():
+    try:
+        if 'files' not in request.files:
+            return _json_response({'error': 'No files uploaded'}, 400)
+        
+        files = request.files.getlist('files')
+        if not files or all(file.filename == '' for file in files):
+            return _json_response({'error': 'No files selected'}, 400)
+        
+        submission_ids = []
+        for file in files:
+            if file and allowed_file(file.filename):
+                filename = secure_filename(file.filename)
+                data = file.read()
+
+                # Generate unique submission ID; uuid stays collision-free
+                # across preforked workers, unlike a millisecond timestamp
+                submission_id = uuid.uuid4().hex
+                submission_ids.append(submission_id)
+                
+                # Initialize result entry
+                results_dict[submission_id] = {
+                    'submission_id': submission_id,
+                    'filename': filename,
+                    'compile_status': 'pending',
+                    'test_results': [],
+                    'memory_usage': [],
+                    'overall_status': 'pending',
+                    'status': 'processing'
+                }
+                
+                # Hand off to the grading pool; the worker writes the file
+                executor.submit(save_and_grade_job, data, filename, submission_id)
+        
+        return _json_response({
+            'submission_ids': submission_ids,
+            'message': f'{len(submission_ids)} files uploaded and queued for grading'
+        })
+    except Exception as e:
+        return _json_response({'error': f'Batch upload failed: {str(e)}'}, 500)
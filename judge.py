@@ -1,4 +1,5 @@
 import os
+import re
 import subprocess
 
 # Paths
@@ -23,9 +24,20 @@ def run_test(input_file, expected_file):
         output = result.stdout.strip()
         return output == expected, output, expected
 
+# Discover test cases with a single directory scan
+testcase_pattern = re.compile(r'^(hidden_)?input(\d+)\.txt$')
+public_cases = []
+hidden_cases = []
+for entry in os.scandir(testcase_dir):
+    m = testcase_pattern.match(entry.name)
+    if m:
+        (hidden_cases if m.group(1) else public_cases).append(int(m.group(2)))
+public_cases.sort()
+hidden_cases.sort()
+
 # Public test cases
 print("✅ Public Test Cases:")
-for i in range(1, 3):
+for i in public_cases:
     ok, out, exp = run_test(f"{testcase_dir}/input{i}.txt", f"{testcase_dir}/output{i}.txt")
     print(f"Test {i}: {'PASS' if ok else 'FAIL'}")
     if not ok:
@@ -33,6 +45,6 @@ for i in range(1, 3):
 
 # Hidden test cases
 print("\n🔒 Hidden Test Cases:")
-for i in range(1, 3):
+for i in hidden_cases:
     ok, _, _ = run_test(f"{testcase_dir}/hidden_input{i}.txt", f"{testcase_dir}/hidden_output{i}.txt")
     print(f"Hidden Test {i}: {'PASS' if ok else 'FAIL'}")
@@ -0,0 +1,16 @@
+"""WSGI entrypoint for running the judge under a production server.
+
+Run with:
+
+    gunicorn --preload -w $(nproc) -k gthread --threads 4 wsgi:app
+
+--preload is required: it imports app once in the gunicorn master, so
+the Manager process behind the results store is created before the
+workers fork and every worker shares it. Each worker lazily starts its
+own grading pool on first submission.
+"""
+from app import app
+
+if __name__ == "__main__":
+    # Dev fallback: python wsgi.py
+    app.run(debug=True)